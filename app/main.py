@@ -2,18 +2,21 @@ from __future__ import annotations
 
 import asyncio
 import os
+import sys
 import time
-from dataclasses import dataclass
-from typing import Any
+from dataclasses import dataclass, replace
+from typing import Any, Optional
 
 from dotenv import load_dotenv
 from loguru import logger
+from pipecat.pipeline.runner import PipelineRunner
 
 from app.orchestration.daily_text_transport import DailyTextTransport, DailyTextTransportConfig
 
 from app.orchestration.daily_voice_transport import (
     DailyVoiceTransport,
     DailyVoiceTransportConfig,
+    join_lines,
 )
 print(f"[boot] OUTRIVAL_MODE={os.getenv('OUTRIVAL_MODE')}")
 
@@ -35,6 +38,69 @@ SCENARIO = [
     Step("teller", "You’re welcome. Have a great day—ending the session now."),
 ]
 
+def _group_steps(steps: list[Step]) -> list[tuple[str, list[str]]]:
+    """Collapse runs of consecutive same-speaker steps into (speaker, texts) groups."""
+    groups: list[tuple[str, list[str]]] = []
+    for step in steps:
+        if groups and groups[-1][0] == step.speaker:
+            groups[-1][1].append(step.text)
+        else:
+            groups.append((step.speaker, [step.text]))
+    return groups
+
+def _build(bot_name: str, cfg: Any, runner: PipelineRunner) -> Any:
+    """Construct the transport for `cfg`; both bots' pipelines run on the one shared `runner`."""
+    if isinstance(cfg, DailyVoiceTransportConfig):
+        return DailyVoiceTransport(bot_name=bot_name, cfg=cfg, runner=runner)
+    return DailyTextTransport(bot_name=bot_name, cfg=cfg, runner=runner)
+
+async def _start_pair(teller_cfg: Any, customer_cfg: Any, runner: PipelineRunner) -> tuple[Any, Any]:
+    """
+    Build and join teller + customer concurrently.
+
+    A failed join cancels the other, and both are shut down before the error
+    propagates, so a bot that did join never outlives a failed start. A join
+    timeout surfaces as a bare TimeoutError, not wrapped in an ExceptionGroup.
+    """
+    teller = _build("Bank Teller Bot", teller_cfg, runner)
+    customer = _build("Customer Bot", customer_cfg, runner)
+    try:
+        try:
+            async with asyncio.TaskGroup() as tg:
+                tg.create_task(teller.start())
+                tg.create_task(customer.start())
+        except* TimeoutError as eg:
+            raise eg.exceptions[0] from None
+    except BaseException:
+        await _shutdown(teller, customer)
+        raise
+    return teller, customer
+
+async def _shutdown(*transports: Any, timeout_s: float = 15.0) -> None:
+    """
+    Leave the room with every transport in parallel under one overall deadline.
+
+    All pipeline cancels go out first, so one stalled peer can't delay the
+    others' leave, and the whole teardown is bounded by `timeout_s`. A failing
+    transport is logged and skipped: shutdown runs from `finally` blocks and
+    must not mask the error that got us here.
+    """
+    async def attempt(step: Any) -> None:
+        try:
+            await step()
+        except Exception:  # noqa: BLE001 - pipecat/Daily teardown can raise anything; log, don't mask
+            logger.exception("{} failed during shutdown", step.__qualname__)
+
+    async with asyncio.TaskGroup() as tg:
+        for t in transports:
+            tg.create_task(attempt(t.stop_fast))
+    try:
+        async with asyncio.timeout(timeout_s), asyncio.TaskGroup() as tg:
+            for t in transports:
+                tg.create_task(attempt(t.stop))
+    except TimeoutError:
+        logger.warning("shutdown did not complete within {}s", timeout_s)
+
 async def run_text_mvp() -> None:
     load_dotenv()
     logger.disable("pipecat.processors.frameworks.rtvi")
@@ -43,18 +109,16 @@ async def run_text_mvp() -> None:
     token = os.getenv("DAILY_TOKEN", "").strip().strip('"') or None
     if not room_url: 
         raise RuntimeError("DAILY_ROOM_URL is required in .env")
-    
-    teller = DailyTextTransport(
-        bot_name="Bank Teller Bot",
-        cfg=DailyTextTransportConfig(room_url=room_url, token=token),
-    )
-    customer = DailyTextTransport(
-        bot_name = "Customer Bot",
-        cfg=DailyTextTransportConfig(room_url=room_url, token=token),
-    )
 
-    #Start/Join FIRST
-    await asyncio.gather(teller.start(), customer.start())
+    pace_s = int(os.getenv("OUTRIVAL_PACE_MS", "0").strip() or 0) / 1000
+    # Un-acked turns in flight; 1 is strict send->ack->send, 2+ overlaps acks with later sends
+    window = max(1, int(os.getenv("OUTRIVAL_TEXT_WINDOW", "2").strip() or 2))
+
+    cfg = DailyTextTransportConfig(room_url=room_url, token=token)
+
+    #Build + Start/Join FIRST
+    runner = PipelineRunner()
+    teller, customer = await _start_pair(cfg, cfg, runner)
     await asyncio.sleep(0.5)
     turns_sent = 0
     turns_acked = 0
@@ -63,26 +127,49 @@ async def run_text_mvp() -> None:
     try: 
         t0 = time.perf_counter()
 
-        for step in SCENARIO:
-            if step.speaker == "customer":
-                await customer.send_text(step.text)
-                turns_sent += 1
-                await teller.wait_for_text_from("Customer Bot", timeout_s=5)
-                turns_acked += 1
-            else:
-                await teller.send_text(step.text)
-                turns_sent += 1
-                await customer.wait_for_text_from("Bank Teller Bot", timeout_s=5)
-                turns_acked += 1
-        # for step in SCENARIO:
-        #     if step.speaker == "customer":
-        #         await customer.speak(step.text)
-        #     else:
-        #         await teller.speak(step.text)
-
-            # give time for TTS to play before next turn
-            await asyncio.sleep(min(4.0, 0.08 * len(step.text)))
-
+        # Window-of-N pipeline: the next turn goes out as soon as a credit frees
+        # up, so ack N overlaps the network flight of send N+1. Every line carries
+        # its turn_id and each ack waits for that id, so an ack that overtakes an
+        # earlier one stays queued for its own turn. Adjacent same-speaker steps
+        # go out as one batched app message.
+        credits = asyncio.Semaphore(window)
+        in_flight: asyncio.Queue[tuple[str, int, int]] = asyncio.Queue()
+        groups = _group_steps(SCENARIO)
+
+        async def produce() -> None:
+            nonlocal turns_sent
+            for speaker, texts in groups:
+                await credits.acquire()
+                sender = customer if speaker == "customer" else teller
+                first_turn = turns_sent + 1
+                await sender.send_texts(texts, turn_id=first_turn)
+                turns_sent += len(texts)
+                in_flight.put_nowait((speaker, first_turn, len(texts)))
+
+                # Turns are paced by peer acks; optional extra delay for readability only
+                if pace_s:
+                    await asyncio.sleep(pace_s)
+
+        async def consume() -> None:
+            nonlocal turns_acked
+            for _ in groups:
+                speaker, first_turn, count = await in_flight.get()
+                for turn_id in range(first_turn, first_turn + count):
+                    if speaker == "customer":
+                        await teller.wait_for_text_from("Customer Bot", timeout_s=5, turn_id=turn_id)
+                    else:
+                        await customer.wait_for_text_from("Bank Teller Bot", timeout_s=5, turn_id=turn_id)
+                    turns_acked += 1
+                credits.release()
+
+        # TaskGroup, not gather: a consumer timeout must also cancel the producer,
+        # which may be parked on credits.acquire() or mid-send during teardown.
+        try:
+            async with asyncio.TaskGroup() as tg:
+                tg.create_task(produce())
+                tg.create_task(consume())
+        except* TimeoutError as eg:
+            raise eg.exceptions[0] from None
 
         dur_ms = int((time.perf_counter() - t0) * 1000)
         print(
@@ -98,7 +185,7 @@ async def run_text_mvp() -> None:
         raise
     finally:
         # Leave cleanly
-        await asyncio.gather(teller.stop(), customer.stop())
+        await _shutdown(teller, customer)
 
 async def run_audio_mvp() -> None:
     load_dotenv()
@@ -113,31 +200,31 @@ async def run_audio_mvp() -> None:
     if not openai_api_key:
         raise RuntimeError("OPENAI_API_KEY is required for OpenAI TTS in Phase 2")
 
-    teller = DailyVoiceTransport(
-        bot_name="Bank Teller Bot",
-        cfg=DailyVoiceTransportConfig(
-            room_url=room_url,
-            token=token,
-            openai_api_key=openai_api_key,
-            transcription_enabled=False,
-        ),
-    )
-    customer = DailyVoiceTransport(
-        bot_name="Customer Bot",
-        cfg=DailyVoiceTransportConfig(
-            room_url=room_url,
-            token=token,
-            openai_api_key=openai_api_key,
-            transcription_enabled=False,
-        ),
+    cfg = DailyVoiceTransportConfig(
+        room_url=room_url,
+        token=token,
+        openai_api_key=openai_api_key,
+        transcription_enabled=False,
     )
 
     def estimate_speech_s(text: str) -> float:
         words = max(1, len(text.split()))
         return min(6.0, (words / 2.5) + 0.6)
 
-    # Start/Join FIRST  ✅ (back at run_audio_mvp level)
-    await asyncio.gather(teller.start(), customer.start())
+    # Adjacent same-speaker steps are spoken as one utterance, one turn each
+    groups = _group_steps(SCENARIO)
+
+    # Build + Start/Join FIRST  ✅ (back at run_audio_mvp level)
+    # Each bot pre-synthesizes its own opening utterance while joining
+    def first_line(speaker: str) -> tuple[str, ...]:
+        return tuple(join_lines(texts) for who, texts in groups if who == speaker)[:1]
+
+    runner = PipelineRunner()
+    teller, customer = await _start_pair(
+        replace(cfg, warmup_texts=first_line("teller")),
+        replace(cfg, warmup_texts=first_line("customer")),
+        runner,
+    )
 
     turns_sent = 0
     turns_acked = 0
@@ -147,34 +234,40 @@ async def run_audio_mvp() -> None:
     try:
         t0 = time.perf_counter()
 
-        for turn_id, step in enumerate(SCENARIO, start=1):
+        for turn_id, (who, texts) in enumerate(groups, start=1):
             t_turn = time.perf_counter()
 
-            if step.speaker == "customer":
-                await customer.speak(step.text)
-                turns_sent += 1
-
-                # Let audio play out (since transcription is off)
-                await asyncio.sleep(estimate_speech_s(step.text))
-
-                await customer.send_control({"type": "turn_done", "name": "Customer Bot", "turn_id": turn_id})
-                await teller.wait_for_control_from("Customer Bot", turn_id, timeout_s=8)
-                turns_acked += 1
+            if who == "customer":
+                speaker, listener, name = customer, teller, "Customer Bot"
             else:
-                await teller.speak(step.text)
-                turns_sent += 1
+                speaker, listener, name = teller, customer, "Bank Teller Bot"
+            speech_s = estimate_speech_s(join_lines(texts))
+
+            # Arm the listener's ack wait before speaking, so the turn_done is
+            # being awaited the moment it lands rather than after speak returns.
+            ack = asyncio.create_task(
+                listener.wait_for_control_from(name, turn_id, timeout_s=speech_s + 8)
+            )
+            try:
+                await speaker.speak_many(texts)
+                turns_sent += len(texts)
 
-                await asyncio.sleep(estimate_speech_s(step.text))
+                # Let audio play out (since transcription is off)
+                await asyncio.sleep(speech_s)
 
-                await teller.send_control({"type": "turn_done", "name": "Bank Teller Bot", "turn_id": turn_id})
-                await customer.wait_for_control_from("Bank Teller Bot", turn_id, timeout_s=8)
-                turns_acked += 1
+                # Queuing the frame completes without a loop turn; the ack confirms delivery
+                await speaker.send_turn_done(turn_id)
+                await ack
+            finally:
+                ack.cancel()
+            turns_acked += len(texts)
 
             turn_latency_ms.append(int((time.perf_counter() - t_turn) * 1000))
 
         dur_ms = int((time.perf_counter() - t0) * 1000)
-        p50 = sorted(turn_latency_ms)[len(turn_latency_ms) // 2] if turn_latency_ms else -1
-        p95 = sorted(turn_latency_ms)[max(0, int(len(turn_latency_ms) * 0.95) - 1)] if turn_latency_ms else -1
+        latencies = sorted(turn_latency_ms)
+        p50 = latencies[len(latencies) // 2] if latencies else -1
+        p95 = latencies[max(0, int(len(latencies) * 0.95) - 1)] if latencies else -1
 
         print(
             "\nPhase 2 Summary\n"
@@ -191,14 +284,48 @@ async def run_audio_mvp() -> None:
         print(f"\n[ERROR] timeout: {e}\n")
         raise
     finally:
-        await asyncio.gather(teller.stop(), customer.stop())
+        await _shutdown(teller, customer)
+
+def _run(coro: Any) -> None:
+    """
+    Run `coro` on uvloop when it is installed (the `perf` extra), else the stdlib loop.
+    """
+    try:
+        import uvloop
+    except ImportError:
+        asyncio.run(coro)
+        return
+
+    with asyncio.Runner(loop_factory=uvloop.new_event_loop) as runner:
+        runner.run(coro)
+
+def _log_level(raw: Optional[str]) -> Optional[str]:
+    """Return `raw` as a loguru level name, or None if loguru doesn't know it."""
+    name = (raw or "INFO").strip().upper() or "INFO"
+    try:
+        logger.level(name)
+    except ValueError:
+        return None
+    return name
 
 def main() -> None:
+    # Before anything reads the environment, so .env settings (log level, mode) apply
+    load_dotenv()
+
+    # enqueue=True hands formatting + stderr writes to loguru's writer thread,
+    # keeping per-message logging off the event loop.
+    raw_level = os.getenv("OUTRIVAL_LOG_LEVEL")
+    level = _log_level(raw_level)
+    logger.remove()
+    logger.add(sys.stderr, enqueue=True, level=level or "INFO")
+    if level is None:
+        logger.warning("unknown OUTRIVAL_LOG_LEVEL={!r}; using INFO", raw_level)
+
     mode = os.getenv("OUTRIVAL_MODE", "text").strip().lower()
     if mode == "audio":
-        asyncio.run(run_audio_mvp())
+        _run(run_audio_mvp())
     else:
-        asyncio.run(run_text_mvp())
+        _run(run_text_mvp())
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -1,9 +1,12 @@
 from __future__ import annotations
 
 import asyncio
+from collections import deque
 from dataclasses import dataclass
 from typing import Any, Awaitable, Callable, Optional
 
+from loguru import logger
+
 from pipecat.pipeline.pipeline import Pipeline
 from pipecat.pipeline.task import PipelineTask
 from pipecat.pipeline.runner import PipelineRunner
@@ -11,6 +14,53 @@ from pipecat.transports.daily.transport import DailyTransport, DailyOutputTransp
 
 AppMessageHandler = Callable[[Any, str], Awaitable[None]] # (message, sender_id)
 
+AppMessageExtractor = Callable[[tuple[Any, ...], dict[str, Any]], tuple[Any, Any]] # -> (payload, sender)
+
+_TEXT_TYPES = ("text", "text_batch")
+
+_HANDLER_INBOX_MAXSIZE = 256
+
+def _payload_sender_args(args: tuple[Any, ...], kwargs: dict[str, Any]) -> tuple[Any, Any]:
+    # (payload_dict, sender_id)
+    payload = args[0]
+    return (payload if isinstance(payload, dict) else None), args[1]
+
+def _transport_payload_sender_args(args: tuple[Any, ...], kwargs: dict[str, Any]) -> tuple[Any, Any]:
+    # (transport_obj, payload_dict, sender_id, ...)
+    payload = args[1]
+    return (payload if isinstance(payload, dict) else None), (args[2] if len(args) >= 3 else args[0])
+
+def _kwargs_payload_sender(args: tuple[Any, ...], kwargs: dict[str, Any]) -> tuple[Any, Any]:
+    payload = kwargs.get("message") or kwargs.get("data") or kwargs.get("payload")
+    sender = kwargs.get("sender") or kwargs.get("sender_id")
+    return payload, sender
+
+def _probe_app_message(
+    args: tuple[Any, ...], kwargs: dict[str, Any]
+) -> tuple[Any, Any, Optional[AppMessageExtractor]]:
+    """
+    Detect the on_app_message calling convention from one call.
+
+    Returns (payload, sender, extractor); extractor is None when the shape could
+    not be pinned down, so the next message probes again.
+    """
+    # Common patterns we've seen:
+    # 1) (payload_dict, sender_id)
+    # 2) (transport_obj, payload_dict, sender_id, ...)
+    # 3) (transport_obj, sender_id, payload_dict, ...)  (rare)
+    if len(args) >= 2:
+        if isinstance(args[0], dict):
+            extract: Optional[AppMessageExtractor] = _payload_sender_args
+        elif isinstance(args[1], dict):
+            extract = _transport_payload_sender_args
+        else:
+            # fallback: try kwargs (don't pin; a later message may be positional)
+            return (*_kwargs_payload_sender(args, kwargs), None)
+    else:
+        extract = _kwargs_payload_sender
+
+    return (*extract(args, kwargs), extract)
+
 @dataclass(frozen=True)
 class DailyTextTransportConfig:
     room_url: str
@@ -27,9 +77,25 @@ class DailyTextTransport:
     """
 
     #! ---------------- Construction / Wiring ------------------
-    def __init__(self, *, bot_name: str, cfg: DailyTextTransportConfig) -> None:
+    def __init__(
+        self,
+        *,
+        bot_name: str,
+        cfg: DailyTextTransportConfig,
+        runner: Optional[PipelineRunner] = None,
+    ) -> None:
+        """
+        `runner` lets several transports share one PipelineRunner (one SIGINT
+        handler, one coordinated cancel); if omitted, start() creates its own.
+        """
         self._bot_name = bot_name
         self._cfg = cfg
+        self._shared_runner = runner
+
+        # Per-bot constants for the send path
+        self._log_pad = " " * 5 if bot_name == "Customer Bot" else " " * 2
+        self._text_base = {"type": "text", "name": bot_name}
+        self._batch_base = {"type": "text_batch", "name": bot_name}
 
         self._transport = DailyTransport(
             room_url=cfg.room_url,
@@ -44,9 +110,18 @@ class DailyTextTransport:
         self._runner: Optional[PipelineRunner] = None
         self._task: Optional[PipelineTask] = None
         self._run_task: Optional[asyncio.Task] = None
+        self._cancel_requested = False
 
-        self._inbox: asyncio.Queue[tuple[Any, str]] = asyncio.Queue()
+        # Waiter inbox: plain deque + wakeup event, so wait_for_text_from can
+        # pick out a match and leave unrelated messages for later consumers.
+        self._inbox: deque[tuple[dict[str, Any], str]] = deque()
+        self._inbox_ev = asyncio.Event()
         self._dumped_first_app_message = False
+        self._extract_fn: Optional[AppMessageExtractor] = None
+
+        # Handler dispatch: one long-lived consumer instead of a task per message
+        self._handler_inbox: asyncio.Queue[tuple[Any, str]] = asyncio.Queue(maxsize=_HANDLER_INBOX_MAXSIZE)
+        self._consumer: Optional[asyncio.Task] = None
 
         self._register_event_handlers()
     
@@ -76,14 +151,26 @@ class DailyTextTransport:
             if payload is None:
                 return
             
-            self._inbox.put_nowait((payload, sender))
+            # Normalize once here; only text payloads ever reach the waiter inbox.
+            text_payload = self._normalize_app_payload(payload)
+            if text_payload is not None:
+                for item in self._split_text_batch(text_payload):
+                    self._inbox.append((item, sender))
+                self._inbox_ev.set()
 
             if self._on_app_message is not None:
-                asyncio.create_task(self._on_app_message(payload, str(sender)))
+                try:
+                    self._handler_inbox.put_nowait((payload, str(sender)))
+                except asyncio.QueueFull:
+                    # Slow handler: drop the oldest message rather than grow without bound
+                    self._handler_inbox.get_nowait()
+                    self._handler_inbox.put_nowait((payload, str(sender)))
     
     #!---------------- Public API ------------------
     def set_app_message_handler(self, handler: AppMessageHandler) -> None:
         self._on_app_message = handler
+        if self._task is not None:
+            self._ensure_consumer()
 
     async def start(self) -> None:
         """
@@ -98,15 +185,33 @@ class DailyTextTransport:
             self._transport.output(),
         ])
 
-        self._task = PipelineTask(pipeline, enable_rtvi=False)
-        self._runner = PipelineRunner()
+        # No RTVI processor/observer and no turn-tracking observer: neither is used
+        # here, and both would otherwise see every frame (including app messages).
+        self._task = PipelineTask(pipeline, enable_rtvi=False, enable_turn_tracking=False)
+        self._runner = self._shared_runner or PipelineRunner()
 
         # Run in background task (within this process)
         self._run_task = asyncio.create_task(self._runner.run(self._task))
+        if self._on_app_message is not None:
+            self._ensure_consumer()
 
         # Wait until joined (or raise)
         await self.wait_joined()
 
+    async def stop_fast(self) -> None:
+        """
+        Request pipeline cancellation (and so the leave) without waiting for on_left.
+
+        Lets an orchestrator kick off every bot's leave before awaiting any of them;
+        a later stop() finishes the teardown.
+        """
+        if self._task is None or self._cancel_requested:
+            return
+        self._cancel_requested = True
+
+        # Cancel the pipeline task; this triggers Daily transport shutdown/leave.
+        await self._task.cancel()
+
     async def stop(self) -> None:
         """
         Stop the pipeline task so the trasnport leaves.
@@ -114,10 +219,17 @@ class DailyTextTransport:
         if self._task is None: 
             return
         
-        # Cancel the pipeline task; this triggers Daily transport shutdown/leave.
-        await self._task.cancel()
+        await self.stop_fast()
         await self.wait_left()
 
+        if self._consumer is not None:
+            self._consumer.cancel()
+            try:
+                await self._consumer
+            except asyncio.CancelledError:
+                pass
+            self._consumer = None
+
         if self._run_task is not None:
             # Ensure background runner task is done
             try: 
@@ -127,6 +239,7 @@ class DailyTextTransport:
         self._run_task = None
         self._task = None
         self._runner = None
+        self._cancel_requested = False
     
     #! ---------------- Public API: Lifecycle Helpers ------------------
     async def wait_joined(self, timeout_s: float = 15.0) -> None:
@@ -139,92 +252,145 @@ class DailyTextTransport:
         await asyncio.wait_for(self._left.wait(), timeout=timeout_s)
 
     #! ---------------- Public API: Messaging ------------------    
-    async def send_text(self, text: str) -> None:
+    async def send_text(self, text: str, turn_id: Optional[int] = None) -> None:
         """
         send an app/ddata-channel message through the Pipecat pipeline.
 
         Why: In Pipecat, app messages are sent as OutputTransportMessageFrame(s), 
         not via transport.send_app_message(). The transport output processor
         will deliver it over daily, and peers receive it via on_app_message.
+
+        `turn_id`, when given, rides along so the peer can match this exact turn.
         """
 
         if self._task is None:
             raise RuntimeError("Transport not started; call start() before send_text()")
 
-        payload = {"type": "text", "text": text, "name": self._bot_name}
+        payload = {**self._text_base, "text": text}
+        if turn_id is not None:
+            payload["turn_id"] = turn_id
 
         # Daily output transport consumes OutputTransportMessgeFrame; Daily has a typed subclass.
         frame = DailyOutputTransportMessageFrame(payload)
 
         await self._task.queue_frame(frame)
 
-        if self._bot_name == "Customer Bot":
-            spaces = " " * 5
-        else: 
-            spaces = " " * 2
-        print(f"[sent-app] {self._bot_name}:", spaces, text)
-        
-    
-    async def wait_for_text_from(self, expected_name: str, timeout_s: float = 5.0) -> dict[str, Any]:
-        deadline = asyncio.get_running_loop().time() + timeout_s
-        while True:
-            remaining = deadline - asyncio.get_running_loop().time()
-            if remaining <= 0:
-                raise TimeoutError(
-                    f"{self._bot_name} did not receive message from {expected_name} within {timeout_s}s"
-                )
+        logger.info("[sent-app] {}: {} {}", self._bot_name, self._log_pad, text)
 
-            msg, sender = await asyncio.wait_for(self._inbox.get(), timeout=remaining)
+    async def send_texts(self, texts: list[str], turn_id: Optional[int] = None) -> None:
+        """
+        Send several consecutive lines from this bot as one app message.
 
-            payload = self._normalize_app_payload(msg)
-            if payload is None:
-                continue
-            
-            self_id = self.participant_id()
-            if self_id and sender == self_id:
-                continue
+        Peers split the "text_batch" payload back into individual "text" payloads
+        at ingress, so wait_for_text_from still sees one entry per line. With a
+        `turn_id`, line i of the batch is turn `turn_id + i`.
+        """
+        if self._task is None:
+            raise RuntimeError("Transport not started; call start() before send_texts()")
 
-            if payload.get("name") == expected_name:
-                return payload
+        if len(texts) == 1:
+            await self.send_text(texts[0], turn_id)
+            return
+
+        payload = {**self._batch_base, "texts": list(texts)}
+        if turn_id is not None:
+            payload["turn_id"] = turn_id
+        await self._task.queue_frame(DailyOutputTransportMessageFrame(payload))
+
+        for text in texts:
+            logger.info("[sent-app] {}: {} {}", self._bot_name, self._log_pad, text)
+        
+    
+    async def wait_for_text_from(
+        self, expected_name: str, timeout_s: float = 5.0, turn_id: Optional[int] = None
+    ) -> dict[str, Any]:
+        """
+        Wait for the oldest text from `expected_name`; with `turn_id`, only that turn.
+
+        Matching on turn_id keeps a message that overtook an earlier one queued
+        for its own waiter instead of pairing it with the wrong turn.
+        """
+        # One deadline for the whole wait; no remaining-time bookkeeping per wakeup
+        try:
+            async with asyncio.timeout(timeout_s):
+                while True:
+                    payload = self._take_text_from(expected_name, turn_id)
+                    if payload is not None:
+                        return payload
+                    self._inbox_ev.clear()
+                    await self._inbox_ev.wait()
+        except TimeoutError as e:
+            raise TimeoutError(
+                f"{self._bot_name} did not receive message from {expected_name} within {timeout_s}s"
+            ) from e
     
-    async def recv(self, timeout_s: float = 5.0) -> tuple[Any, str]:    
-        return await asyncio.wait_for(self._inbox.get(), timeout=timeout_s)
+    async def recv(self, timeout_s: float = 5.0) -> tuple[dict[str, Any], str]:    
+        while not self._inbox:
+            self._inbox_ev.clear()
+            await asyncio.wait_for(self._inbox_ev.wait(), timeout=timeout_s)
+        return self._inbox.popleft()
     
     #! ---------------- Public API: Introspection ------------------
     def participant_id(self) -> Optional[str]:
         return getattr(self._transport, "participant_id", None)
 
     #! ---------------- Private Helpers ------------------
+    def _ensure_consumer(self) -> None:
+        # Started lazily: no idle task when nobody registered a handler
+        if self._consumer is None:
+            self._consumer = asyncio.create_task(self._consume_app_messages())
+
+    async def _consume_app_messages(self) -> None:
+        while True:
+            payload, sender = await self._handler_inbox.get()
+            if self._on_app_message is None:
+                continue
+            try:
+                await self._on_app_message(payload, sender)
+            except Exception:  # noqa: BLE001 - user handler; one bad message must not kill the consumer
+                logger.exception("{} app message handler failed", self._bot_name)
+
     def _extract_app_message(self, args: tuple[Any, ...], kwargs: dict[str, Any]) -> tuple[Any, str]:
-        # Common patterns we've seen:
-        # 1) (payload_dict, sender_id)
-        # 2) (transport_obj, payload_dict, sender_id, ...)
-        # 3) (transport_obj, sender_id, payload_dict, ...)  (rare)
-        if len(args) >= 2:
-            a0, a1 = args[0], args[1]
-
-            if isinstance(a0, dict):
-                payload = a0
-                sender = a1
-            elif isinstance(a1, dict):
-                payload = a1
-                sender = args[2] if len(args) >= 3 else a0
-            else:
-                # fallback: try kwargs
-                payload = kwargs.get("message") or kwargs.get("data") or kwargs.get("payload")
-                sender = kwargs.get("sender") or kwargs.get("sender_id")
-        else:
-            payload = kwargs.get("message") or kwargs.get("data") or kwargs.get("payload")
-            sender = kwargs.get("sender") or kwargs.get("sender_id")
+        # The calling convention is fixed for a given Pipecat/Daily install, so
+        # once a positional shape has been seen we reuse its extractor directly.
+        if self._extract_fn is not None:
+            payload, sender = self._extract_fn(args, kwargs)
+            return payload, str(sender)
+
+        payload, sender, self._extract_fn = _probe_app_message(args, kwargs)
 
         if not self._dumped_first_app_message:
             self._dumped_first_app_message = True
-            print(
-                f"[debug:first on_app_message] bot={self._bot_name} "
-                f"sender={sender!r} payload={payload!r} raw_args={args!r}"
+            logger.debug(
+                "[debug:first on_app_message] bot={} sender={!r} payload={!r} raw_args={!r}",
+                self._bot_name, sender, payload, args,
             )
         return payload, str(sender)
             
+    def _take_text_from(self, expected_name: str, turn_id: Optional[int] = None) -> Optional[dict[str, Any]]:
+        """
+        Remove and return the oldest text payload from `expected_name` (and for
+        `turn_id`, when given), if one is queued.
+
+        Entries are already normalized at ingress. Our own echoes are dropped on
+        the way; text from other senders stays queued in order.
+        """
+        self_id = self.participant_id()
+        kept: list[tuple[dict[str, Any], str]] = []
+        found: Optional[dict[str, Any]] = None
+
+        while self._inbox:
+            payload, sender = self._inbox.popleft()
+            if self_id and sender == self_id:
+                continue
+            if payload.get("name") == expected_name and (turn_id is None or payload.get("turn_id") == turn_id):
+                found = payload
+                break
+            kept.append((payload, sender))
+
+        self._inbox.extendleft(reversed(kept))
+        return found
+
     def _normalize_app_payload(self, msg: Any) -> Optional[dict[str, Any]]:
         """
         Normalize the various shapes we might see from Daily/Pipecat into the inner dict payload.
@@ -233,12 +399,26 @@ class DailyTextTransport:
             return None
 
         # direct payload
-        if msg.get("type") == "text" and "name" in msg:
+        if msg.get("type") in _TEXT_TYPES and "name" in msg:
             return msg
 
         # common wrappers
         inner = msg.get("message") or msg.get("data") or msg.get("payload")
-        if isinstance(inner, dict) and inner.get("type") == "text" and "name" in inner:
+        if isinstance(inner, dict) and inner.get("type") in _TEXT_TYPES and "name" in inner:
             return inner
 
-        return None
\ No newline at end of file
+        return None
+
+    def _split_text_batch(self, payload: dict[str, Any]) -> list[dict[str, Any]]:
+        """
+        Expand a normalized "text_batch" payload into one "text" payload per line.
+        """
+        if payload.get("type") != "text_batch":
+            return [payload]
+        name = payload["name"]
+        items = [{"type": "text", "text": text, "name": name} for text in payload.get("texts") or ()]
+        first_turn = payload.get("turn_id")
+        if first_turn is not None:
+            for i, item in enumerate(items):
+                item["turn_id"] = first_turn + i
+        return items
\ No newline at end of file
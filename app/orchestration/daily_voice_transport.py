@@ -1,71 +1,458 @@
 from __future__ import annotations
 
 import asyncio
+from collections import OrderedDict, deque
 from dataclasses import dataclass
-from typing import Any, Optional
+from enum import IntEnum
+from typing import Any, AsyncGenerator, Callable, Optional
+
+from loguru import logger
 
 from pipecat.pipeline.pipeline import Pipeline
 from pipecat.pipeline.task import PipelineTask
 from pipecat.pipeline.runner import PipelineRunner
 
-from pipecat.frames.frames import Frame, TTSSpeakFrame, InputAudioRawFrame, StartFrame, EndFrame
-from pipecat.processors.frame_processor import FrameProcessor, FrameDirection
-
-
-
+from pipecat.frames.frames import (
+    ErrorFrame,
+    Frame,
+    TTSAudioRawFrame,
+    TTSSpeakFrame,
+    TTSStartedFrame,
+    TTSStoppedFrame,
+)
 from pipecat.transports.daily.transport import (
-    DailyTransport, 
+    DailyTransport,
     DailyParams,
-    DailyOutputTransportMessageFrame
+    DailyOutputTransportMessageFrame,
 )
 
 from pipecat.services.openai.tts import OpenAITTSService # or DeepgramTTSService, CartesiaTTSService
 
-@dataclass(frozen=True)
+# Candidate keys for the loosely-shaped Daily/Pipecat event payloads, in priority order
+_MESSAGE_KEYS = ("message", "data")
+_PAYLOAD_KEYS = ("message", "data", "payload")
+_SENDER_KEYS = ("sender", "sender_id")
+_TEXT_KEYS = ("text", "transcript")
+_FINAL_KEYS = ("is_final", "final", "completed")
+_SPEAKER_KEYS = (
+    "participantName",
+    "participant_name",
+    "user_name",
+    "speaker",
+    "name",
+    "participantId",
+    "participant_id",
+)
+
+def _first_item(d: Any, keys: tuple[str, ...]) -> tuple[Optional[str], Any]:
+    """(key, value) of the first truthy d[k] over `keys`, or (None, None)."""
+    for k in keys:
+        v = d.get(k)
+        if v:
+            return k, v
+    return None, None
+
+def _first_value(d: Any, keys: tuple[str, ...], default: Any = None) -> Any:
+    """First truthy d[k] over `keys` (same semantics as an `a or b or ...` chain)."""
+    v = _first_item(d, keys)[1]
+    return v if v else default
+
+AppMessageExtractor = Callable[[tuple[Any, ...], dict[str, Any]], tuple[Any, Any]] # -> (payload, sender)
+
+def _payload_sender_args(args: tuple[Any, ...], kwargs: dict[str, Any]) -> tuple[Any, Any]:
+    # 1) (payload_dict, sender_id)
+    return args[0], args[1]
+
+def _transport_payload_sender_args(args: tuple[Any, ...], kwargs: dict[str, Any]) -> tuple[Any, Any]:
+    # 2) (transport_obj, payload_dict, sender_id)
+    return args[1], (args[2] if len(args) >= 3 else "unknown")
+
+def _probe_app_message(args: tuple[Any, ...]) -> tuple[Any, Any, Optional[AppMessageExtractor]]:
+    """
+    Detect the positional on_app_message calling convention from one call.
+
+    Returns (payload, sender, extractor); extractor is None when no positional
+    shape matched, so the caller falls back to kwargs and the next message probes again.
+    """
+    if len(args) >= 2:
+        if isinstance(args[0], dict):
+            extract: AppMessageExtractor = _payload_sender_args
+        elif isinstance(args[1], dict):
+            extract = _transport_payload_sender_args
+        else:
+            return None, "unknown", None
+        return (*extract(args, {}), extract)
+    return None, "unknown", None
+
+_SENTENCE_END = (".", "!", "?", "…")
+_CLOSING_QUOTES = "\"')”’"
+
+def join_lines(texts: list[str]) -> str:
+    """
+    Join consecutive lines into one utterance for speak_many().
+
+    Each line ends in sentence punctuation (a period is added where missing), so
+    TTS pauses between lines instead of running them together. A single line is
+    returned unchanged, so it shares its cache entry with a plain speak().
+    """
+    if len(texts) == 1:
+        return texts[0]
+    parts: list[str] = []
+    for text in texts:
+        text = text.strip()
+        if not text:
+            continue
+        if not text.rstrip(_CLOSING_QUOTES).endswith(_SENTENCE_END):
+            text += "."
+        parts.append(text)
+    return " ".join(parts)
+
+class _Lifecycle(IntEnum):
+    """Monotonic transport lifecycle; later states compare greater."""
+    INIT = 0
+    JOINED = 1
+    LEFT = 2
+
+class _PinnedKey:
+    """
+    `_first_value` over candidate `keys` that remembers which key the payloads use.
+
+    The pinned key is tried first; if its value is truthy that's the whole
+    lookup. Otherwise (absent, None, "") the full first-truthy sweep runs and
+    re-pins on a truthy hit, so null fields fall through exactly as the
+    `a or b or ...` chain does. The one difference from `_first_value`: when
+    the pinned key and a higher-priority key are both truthy, the pinned key
+    wins. A provider schema is fixed per install, so that doesn't arise in practice.
+    """
+
+    __slots__ = ("_keys", "_pinned")
+
+    def __init__(self, keys: tuple[str, ...]) -> None:
+        self._keys = keys
+        self._pinned = keys[0]
+
+    def get(self, d: dict[str, Any], default: Any = None) -> Any:
+        v = d.get(self._pinned)
+        if v:
+            return v
+        k, v = _first_item(d, self._keys)
+        if k is None:
+            return default
+        self._pinned = k
+        return v
+
+def _transcript_is_final(msg: dict[str, Any], top_level: Callable[[dict[str, Any]], Any]) -> bool:
+    """
+    Finality of a Daily transcription message.
+
+    Pipecat's DailyTransport passes Deepgram's result through as
+    msg["rawResponse"], which is where is_final lives; the top-level keys
+    (read via `top_level`) are only a fallback for other payload shapes.
+    """
+    raw = msg.get("rawResponse")
+    if isinstance(raw, dict):
+        final = raw.get("is_final")
+        if final is not None:
+            return bool(final)
+    return bool(top_level(msg))
+
+def _turn_done_matcher(turn_id: int) -> Callable[[tuple[dict[str, Any], str]], bool]:
+    """Filter over control inbox entries, (payload, sender)."""
+    def matches(item: tuple[dict[str, Any], str]) -> bool:
+        payload = item[0]
+        return payload.get("turn_id") == turn_id and payload.get("type") == "turn_done"
+    return matches
+
+def _final_transcript_matcher(contains: Optional[str]) -> Callable[[tuple[str, str, bool]], bool]:
+    """
+    Filter over transcription inbox entries, (text, folded, is_final).
+
+    Specialized once per wait; no needle means finals only.
+    """
+    # casefold once per call; transcripts arrive already folded from ingest
+    needle = (contains or "").casefold().strip()
+    if not needle:
+        return lambda item: item[2]
+
+    def matches(item: tuple[str, str, bool]) -> bool:
+        _, folded, is_final = item
+        return is_final and needle in folded
+    return matches
+
+class _Inbox:
+    """
+    Fixed-capacity FIFO of recent events: a deque(maxlen) plus a wakeup Event.
+
+    Appending is O(1) with no Future churn, and a full ring evicts its oldest
+    entry instead of growing. Not thread-safe; only touch it on the owning loop.
+    """
+
+    __slots__ = ("_items", "_ready")
+
+    def __init__(self, maxlen: int) -> None:
+        self._items: deque[Any] = deque(maxlen=maxlen)
+        self._ready = asyncio.Event()
+
+    def push(self, item: Any) -> bool:
+        """Append `item`; returns True if the oldest entry was evicted to make room."""
+        evicted = len(self._items) == self._items.maxlen
+        self._items.append(item)
+        self._ready.set()
+        return evicted
+
+    def take_first(self, predicate: Callable[[Any], bool]) -> Any:
+        """
+        Remove and return the oldest entry matching `predicate`, or None.
+
+        One synchronous pass; non-matching entries stay queued in order, so
+        they remain visible to other waiters.
+        """
+        for i, item in enumerate(self._items):
+            if predicate(item):
+                del self._items[i]
+                return item
+        return None
+
+    async def wait_push(self) -> None:
+        """Wait for the next push."""
+        self._ready.clear()
+        await self._ready.wait()
+
+class _InboxMap:
+    """
+    Name -> _Inbox, capping how many names incoming events may add.
+
+    Event names come off the network, so an uncapped map would pin a new inbox
+    for every name ever seen. Waiters name their own inbox and always get one;
+    an event for a new name once `max_names` are held is dropped instead.
+    """
+
+    __slots__ = ("_inboxes", "_max_names", "_maxlen")
+
+    def __init__(self, maxlen: int, max_names: int) -> None:
+        self._inboxes: dict[str, _Inbox] = {}
+        self._maxlen = maxlen
+        self._max_names = max_names
+
+    def for_event(self, name: str) -> Optional[_Inbox]:
+        """Inbox for an incoming event from `name`, or None if the map is full."""
+        inbox = self._inboxes.get(name)
+        if inbox is None and len(self._inboxes) < self._max_names:
+            inbox = self._inboxes[name] = _Inbox(self._maxlen)
+        return inbox
+
+    def for_waiter(self, name: str) -> _Inbox:
+        """Inbox a waiter for `name` watches, created past the cap if need be."""
+        inbox = self._inboxes.get(name)
+        if inbox is None:
+            inbox = self._inboxes[name] = _Inbox(self._maxlen)
+        return inbox
+
+@dataclass(frozen=True, slots=True)
 class DailyVoiceTransportConfig:
     room_url: str
     token: Optional[str] = None
     # Daily Transcription (Deepgram) is transport-level
     transcription_enabled: bool = True
+    # Queue interim (is_final=False) transcripts too; off since only finals are awaited
+    include_partials: bool = False
 
     # TTS (pick one provider)
     openai_api_key: Optional[str] = None
     openai_voice: str = "alloy"
-
-class DropInboundAudioFrames(FrameProcessor):
-    async def process_frame(self, frame: Frame, direction: FrameDirection):
-        # IMPORTANT: let base class see StartFrame so this processor becomes "started"
-        if isinstance(frame, StartFrame):
-            await super().process_frame(frame, direction)
+    # In-process LRU of synthesized utterances (0 disables caching)
+    tts_cache_size: int = 256
+    # Lines synthesized into the cache in the background from start(), so an early speak() can hit
+    warmup_texts: tuple[str, ...] = ()
+
+    # Bound on each event inbox; the oldest entry is dropped on overflow
+    inbox_maxsize: int = 64
+    # Transcription inboxes run hotter (especially with include_partials), so size them separately
+    tx_inbox_maxsize: int = 512
+    # Distinct speakers/senders that may get an inbox before new names are dropped
+    max_inbox_names: int = 16
+
+class _AudioRamp:
+    """
+    Re-chunk one utterance's PCM so it starts with a tiny chunk and ramps up.
+
+    The first chunk is FIRST_CHUNK_MS, then each chunk doubles up to MAX_CHUNK_MS.
+    flush() returns the remainder as everything-but-the-tail plus a TAIL_MS tail,
+    rather than padding out a full chunk. One ramp per run_tts call, so every
+    utterance (including the one after an interruption) starts fast.
+    """
+
+    FIRST_CHUNK_MS = 20
+    MAX_CHUNK_MS = 200
+    TAIL_MS = 10
+
+    __slots__ = ("_buf", "_bytes_per_ms", "_next_chunk_ms")
+
+    def __init__(self, sample_rate: int, num_channels: int) -> None:
+        self._buf = bytearray()
+        self._bytes_per_ms = sample_rate * num_channels * 2 // 1000
+        self._next_chunk_ms = self.FIRST_CHUNK_MS
+
+    def feed(self, audio: bytes) -> list[bytes]:
+        self._buf += audio
+        out: list[bytes] = []
+        n = self._next_chunk_ms * self._bytes_per_ms
+        while n and len(self._buf) >= n:
+            out.append(bytes(self._buf[:n]))
+            del self._buf[:n]
+            self._next_chunk_ms = min(self._next_chunk_ms * 2, self.MAX_CHUNK_MS)
+            n = self._next_chunk_ms * self._bytes_per_ms
+        return out
+
+    def flush(self) -> list[bytes]:
+        out: list[bytes] = []
+        tail = self.TAIL_MS * self._bytes_per_ms
+        if tail and len(self._buf) > tail:
+            out.append(bytes(self._buf[:-tail]))
+            del self._buf[:-tail]
+        if self._buf:
+            out.append(bytes(self._buf))
+        self._buf.clear()
+        return out
+
+class _TTSFrameKind(IntEnum):
+    """How run_tts treats a frame coming out of the base TTS service."""
+    OTHER = 0
+    AUDIO = 1
+    STOPPED = 2
+    ERROR = 3
+
+# Exact frame type -> kind, filled on first sight, so each frame costs one dict
+# hit instead of an isinstance chain; subclasses classify like their base.
+_TTS_FRAME_KINDS: dict[type, _TTSFrameKind] = {}
+
+def _tts_frame_kind(frame_type: type) -> _TTSFrameKind:
+    kind = _TTS_FRAME_KINDS.get(frame_type)
+    if kind is None:
+        if issubclass(frame_type, TTSAudioRawFrame):
+            kind = _TTSFrameKind.AUDIO
+        elif issubclass(frame_type, TTSStoppedFrame):
+            kind = _TTSFrameKind.STOPPED
+        elif issubclass(frame_type, ErrorFrame):
+            kind = _TTSFrameKind.ERROR
+        else:
+            kind = _TTSFrameKind.OTHER
+        _TTS_FRAME_KINDS[frame_type] = kind
+    return kind
+
+class CachedOpenAITTSService(OpenAITTSService):
+    """
+    OpenAITTSService with an in-process LRU of synthesized PCM keyed by
+    (voice, sample rate, text).
+
+    Scripted lines repeat across turns and runs; a hit replays the cached chunks
+    as fresh TTSAudioRawFrames instead of making an OpenAI round-trip. Only
+    utterances that finished cleanly (TTSStoppedFrame, no ErrorFrame) are stored.
+
+    Audio is re-chunked through _AudioRamp as it streams in, so the small-first-
+    chunk ramp costs no extra pipeline stage; the cache stores ramped chunks.
+
+    The rate is part of the key because frames are labelled with the service's
+    current sample_rate, which can change once the StartFrame sets the output
+    rate. A prefetch made under a different rate misses instead of replaying
+    audio with the wrong label.
+    """
+
+    def __init__(self, *, cache_size: int = 256, **kwargs: Any) -> None:
+        super().__init__(**kwargs)
+        self._cache_size = cache_size
+        # (voice, sample_rate, text) -> (sample_rate, num_channels, pcm chunks)
+        self._audio_cache: OrderedDict[tuple[str, int, str], tuple[int, int, list[bytes]]] = OrderedDict()
+
+    @property
+    def sample_rate(self) -> int:
+        # Usable before the StartFrame arrives (OpenAI PCM is fixed-rate), so
+        # prefetch() can synthesize while the pipeline is still starting. The
+        # StartFrame may then switch to the output rate, hence the rate in the cache key.
+        return super().sample_rate or self._init_sample_rate or self.OPENAI_SAMPLE_RATE
+
+    @property
+    def chunk_size(self) -> int:
+        # The base class downloads 0.5s of PCM before yielding the first frame.
+        # Stream in small pieces instead; _AudioRamp coalesces them.
+        return self.sample_rate * _AudioRamp.FIRST_CHUNK_MS // 1000 * 2
+
+    async def run_tts(self, text: str, context_id: str) -> AsyncGenerator[Frame, None]:
+        key = (self._voice_id, self.sample_rate, text)
+        hit = self._audio_cache.get(key)
+        if hit is not None:
+            self._audio_cache.move_to_end(key)
+            sample_rate, num_channels, chunks = hit
+            yield TTSStartedFrame(context_id=context_id)
+            for chunk in chunks:
+                yield TTSAudioRawFrame(chunk, sample_rate, num_channels, context_id=context_id)
+            yield TTSStoppedFrame(context_id=context_id)
             return
 
-        # Always pass EndFrame through
-        if isinstance(frame, EndFrame):
-            await self.push_frame(frame, direction)
-            return
+        chunks: list[bytes] = []
+        sample_rate, num_channels = self.sample_rate, 1
+        ramp: Optional[_AudioRamp] = None
+        completed = False
+        async for frame in super().run_tts(text, context_id):
+            kind = _tts_frame_kind(type(frame))
+            if kind is _TTSFrameKind.AUDIO:
+                if ramp is None:
+                    sample_rate, num_channels = frame.sample_rate, frame.num_channels
+                    ramp = _AudioRamp(sample_rate, num_channels)
+                for chunk in ramp.feed(frame.audio):
+                    chunks.append(chunk)
+                    yield TTSAudioRawFrame(chunk, sample_rate, num_channels, context_id=context_id)
+                continue
 
-        # Drop inbound raw audio to prevent echo
-        if direction == FrameDirection.DOWNSTREAM and isinstance(frame, InputAudioRawFrame):
+            if kind is _TTSFrameKind.STOPPED:
+                completed = True
+                for chunk in ramp.flush() if ramp is not None else ():
+                    chunks.append(chunk)
+                    yield TTSAudioRawFrame(chunk, sample_rate, num_channels, context_id=context_id)
+            elif kind is _TTSFrameKind.ERROR:
+                chunks.clear()
+            yield frame
+
+        if completed and chunks and self._cache_size > 0:
+            self._audio_cache[key] = (sample_rate, num_channels, chunks)
+            while len(self._audio_cache) > self._cache_size:
+                self._audio_cache.popitem(last=False)
+
+    async def prefetch(self, text: str) -> None:
+        """Synthesize `text` into the cache without pushing any frames."""
+        if self._cache_size <= 0 or (self._voice_id, self.sample_rate, text) in self._audio_cache:
             return
-
-        await self.push_frame(frame, direction)
+        async for _ in self.run_tts(text, "prefetch"):
+            pass
 
 class DailyVoiceTransport:
-    def __init__(self, *, bot_name: str, cfg: DailyVoiceTransportConfig) -> None:
+    def __init__(
+        self,
+        *,
+        bot_name: str,
+        cfg: DailyVoiceTransportConfig,
+        runner: Optional[PipelineRunner] = None,
+    ) -> None:
+        """
+        `runner` lets several transports share one PipelineRunner (one SIGINT
+        handler, one coordinated cancel); if omitted, start() creates its own.
+        """
         self._bot_name = bot_name
         self._cfg = cfg
+        self._shared_runner = runner
+        # Constant part of turn_done control messages, built once per bot
+        self._turn_done_base = {"type": "turn_done", "name": bot_name}
 
         params = DailyParams(
             transcription_enabled=cfg.transcription_enabled,
+            # Nothing consumes local PCM (Daily transcription runs server-side), so
+            # don't receive/decode inbound audio at all instead of dropping it later.
+            audio_in_enabled=False,
             audio_out_enabled=True,
             audio_out_channels=1,
             microphone_out_enabled=True,
             camera_out_enabled=False,
-
-            # try one of these (only ONE will be valid in your version)
-            rtvi_enabled=False,
-            # enable_rtvi=False,
-            # use_rtvi=False,
+            # RTVI is not a transport param; it's disabled on the PipelineTask in start()
         )
 
 
@@ -76,34 +463,68 @@ class DailyVoiceTransport:
             params=params,
         )
 
-        # Transport lifecycle
-        self._joined = asyncio.Event()
-        self._left = asyncio.Event()
-
-        #transcription inbox: (speaker_name, text, is_final)
-        self._tx_inbox: asyncio.Queue[tuple[str, str, bool]] = asyncio.Queue()
-        self._inbox: asyncio.Queue[tuple[Any, str]] = asyncio.Queue()
+        # Warmup prefetches started by start(); nothing awaits them, stop_fast() cancels
+        self._prefetch_tasks: set[asyncio.Task] = set()
+
+        # Transport lifecycle: INIT -> JOINED -> LEFT, guarded by one condition
+        # so join/leave waiters share a single wakeup path.
+        self._state = _Lifecycle.INIT
+        self._state_cv = asyncio.Condition()
+        # Local participant id, taken from the on_joined payload
+        self._pid: Optional[str] = None
+        self._pid_ready = asyncio.Event()
+
+        # Inboxes are indexed so each waiter only sees its own traffic and never
+        # consumes (and loses) entries meant for another speaker.
+        # transcription: speaker_name -> (text, text.casefold(), is_final)
+        # control:       payload["name"] -> (payload, sender)
+        self._tx_by_speaker = _InboxMap(cfg.tx_inbox_maxsize, cfg.max_inbox_names)
+        self._control_by_name = _InboxMap(cfg.inbox_maxsize, cfg.max_inbox_names)
+        self._inbox_drops = 0
+        # (name, turn_id) -> future resolved by on_app_message when that turn_done lands
+        self._pending_turns: dict[tuple[str, int], asyncio.Future] = {}
+
+        # Transcription payload fields, pinned to whichever key the provider uses
+        self._tx_text = _PinnedKey(_TEXT_KEYS)
+        self._tx_final = _PinnedKey(_FINAL_KEYS)
+        self._tx_speaker = _PinnedKey(_SPEAKER_KEYS)
+        # on_app_message argument extractor, pinned on the first positional match
+        self._extract_fn: Optional[AppMessageExtractor] = None
 
         self._runner: Optional[PipelineRunner] = None
         self._task: Optional[PipelineTask] = None
         self._run_task: Optional[asyncio.Task] = None
+        self._cancel_requested = False
         
         self._register_handlers()
 
         # TTS processor (start with OpenAI TTS for simplicity)
-        self._tts = OpenAITTSService(
+        self._tts = CachedOpenAITTSService(
             api_key=cfg.openai_api_key, 
             voice=cfg.openai_voice,
+            cache_size=cfg.tts_cache_size,
         )
 
     def _register_handlers(self) -> None:
+        # Bound methods the per-event handlers use, resolved once per transport
+        tx_final = self._tx_final.get
+        tx_text = self._tx_text.get
+        tx_speaker = self._tx_speaker.get
+        tx_inboxes = self._tx_by_speaker
+        offer = self._offer
+        deliver = self._deliver_control
+
         @self._transport.event_handler("on_joined")
-        def _on_joined(*args, **kwargs) -> None: 
-            self._joined.set()
+        async def _on_joined(*args, **kwargs) -> None:
+            # Pipecat calls this as (transport, data); data["participants"]["local"]["id"]
+            data = next((a for a in args if isinstance(a, dict)), None) or kwargs.get("data") or {}
+            local = (data.get("participants") or {}).get("local") or {}
+            self._set_pid(local.get("id") or self.participant_id())
+            await self._set_state(_Lifecycle.JOINED)
 
         @self._transport.event_handler("on_left")
-        def _on_left(*args, **kwargs) -> None:
-            self._left.set()
+        async def _on_left(*args, **kwargs) -> None:
+            await self._set_state(_Lifecycle.LEFT)
 
         @self._transport.event_handler("on_transcription_message")
         def _on_transcription_message(*args, **kwargs) -> None:
@@ -111,111 +532,159 @@ class DailyVoiceTransport:
             Daily transport can emit transcription events when transcription_enabled = True
             The exact payload shape may vary; normalize defensively
             """
-            msg = kwargs.get("message") or kwargs.get("data") or (args[0] if args else None)
+            # Pipecat calls handlers as (transport, message); take the first dict positional
+            msg = _first_value(kwargs, _MESSAGE_KEYS) if kwargs else None
+            if msg is None:
+                for a in args:
+                    if isinstance(a, dict):
+                        msg = a
+                        break
             if not isinstance(msg, dict):
                 return
-            
-            # Common fields seen in Daily transcription events:     
-            text = (msg.get('text') or msg.get("transcript") or "").strip()
-            if not text:
+
+            logger.debug("[tx:event] bot={} msg={}", self._bot_name, msg)
+
+            # Partials outnumber finals. The only transcript waiter,
+            # wait_for_final_transcript_from, rejects non-finals in its matcher, so
+            # no waiter can ever consume a partial: dropping them here whether or
+            # not a waiter is registered is equivalent, and keeps them from
+            # evicting finals out of the bounded inbox.
+            is_final = _transcript_is_final(msg, tx_final)
+            if not is_final and not self._cfg.include_partials:
                 return
-            
-            is_final = bool(msg.get("is_final") or msg.get("final") or msg.get("completed"))
 
-            print(f"[tx:event] bot={self._bot_name} msg={msg}")
+            # Raw text is queued as-is alongside one shared casefolded copy for matching
+            text = tx_text(msg, "")
+            if not text:
+                return
 
             #speaker identity fields vary; normalize
-            speaker_name = (
-                msg.get("participantName")
-                or msg.get("participant_name")
-                or msg.get("user_name")
-                or msg.get("speaker")
-                or msg.get("name")
-                or msg.get("participantId")
-                or msg.get("participant_id")
-                or "unknown"
-            )
-
-            self._tx_inbox.put_nowait((str(speaker_name), text, is_final))
+            speaker_name = tx_speaker(msg, "unknown")
+
+            offer(tx_inboxes.for_event(str(speaker_name)), (text, text.casefold(), is_final))
 
         @self._transport.event_handler("on_app_message")
         def _on_app_message(*args, **kwargs) -> None:
-            print(f"[control:event_raw] bot={self._bot_name} args={args} kwargs={kwargs}")
+            logger.debug("[control:event_raw] bot={} args={} kwargs={}", self._bot_name, args, kwargs)
 
-            msg = None
-            sender = "unknown"
+            # The calling convention is fixed for a given Pipecat/Daily install, so
+            # once a positional shape has been seen its extractor is reused directly.
+            if self._extract_fn is not None:
+                msg, sender = self._extract_fn(args, kwargs)
+            else:
+                msg, sender, self._extract_fn = _probe_app_message(args)
 
-            # Common shapes:
-            # 1) (payload_dict, sender_id)
-            # 2) (transport_obj, payload_dict, sender_id)
             # 3) kwargs: message/data + sender/sender_id
-            if len(args) >= 2:
-                a0, a1 = args[0], args[1]
-
-                if isinstance(a0, dict):
-                    # (payload, sender)
-                    msg = a0
-                    sender = args[1] if len(args) >= 2 else "unknown"
-
-                elif isinstance(a1, dict):
-                    # (transport, payload, sender)
-                    msg = a1
-                    sender = args[2] if len(args) >= 3 else "unknown"
-
-            if msg is None:
-                msg = kwargs.get("message") or kwargs.get("data") or kwargs.get("payload")
-
-            if sender == "unknown":
-                sender = kwargs.get("sender") or kwargs.get("sender_id") or "unknown"
+            if kwargs:
+                if msg is None:
+                    msg = _first_value(kwargs, _PAYLOAD_KEYS)
+                if sender == "unknown":
+                    sender = _first_value(kwargs, _SENDER_KEYS, "unknown")
 
             if msg is None:
                 return
 
-            print(f"[control:recv] bot={self._bot_name} sender={sender} msg={msg}")
-            self._inbox.put_nowait((msg, str(sender)))
-
-
+            logger.debug("[control:recv] bot={} sender={} msg={}", self._bot_name, sender, msg)
+            # Only named dict payloads can ever satisfy wait_for_control_from
+            if not isinstance(msg, dict) or msg.get("name") is None:
+                return
+            deliver(str(msg["name"]), msg, str(sender))
+
+
+
+    async def _set_state(self, state: _Lifecycle) -> None:
+        async with self._state_cv:
+            self._state = state
+            self._state_cv.notify_all()
+
+    def _offer(self, inbox: Optional[_Inbox], item: Any) -> None:
+        """
+        Push onto `inbox`, which drops its oldest entry when full.
+
+        Waiters only care about recent events; a stale backlog just delays the
+        match they're looking for. A None inbox (a new name past the inbox-name
+        cap) drops the event outright.
+        """
+        if inbox is None or inbox.push(item):
+            self._inbox_drops += 1
+            logger.warning("[inbox:drop] bot={} drops={}", self._bot_name, self._inbox_drops)
+
+    def _deliver_control(self, name: str, msg: dict[str, Any], sender: str) -> None:
+        """
+        Route a named control message to its waiter or inbox.
+
+        Runs on the event loop: pipecat's Daily client marshals Daily's thread
+        callbacks onto it (run_coroutine_threadsafe) before any handler is called,
+        so the inboxes and pending-turn futures need no thread-safe hop.
+        """
+        # Hand an awaited turn_done straight to its waiter, skipping the inbox
+        if msg.get("type") == "turn_done":
+            fut = self._pending_turns.pop((name, msg.get("turn_id")), None)
+            if fut is not None and not fut.done():
+                fut.set_result(msg)
+                return
+        self._offer(self._control_by_name.for_event(name), (msg, sender))
 
     async def start(self) -> None: 
         if self._run_task is not None:
             return
         
-        # pipeline = Pipeline([
-        #     self._transport.input(),
-        #     DropInboundAudioFrames(),
-        #     self._tts,
-        #     self._transport.output(),
-        # ])
+        # TTS-only: no input stage. The output transport joins the room on its own,
+        # and event handlers still fire; without an input processor Daily no longer
+        # pushes transcription/app-message frames through tts -> output for nothing.
         pipeline = Pipeline([
-            self._transport.input(),
             self._tts,
             self._transport.output(),
         ])
 
-        self._task = PipelineTask(pipeline, enable_rtvi=False)
-        self._runner = PipelineRunner()
+        # No RTVI processor/observer and no turn-tracking observer: neither is used
+        # here, and both would otherwise see every frame (including app messages).
+        self._task = PipelineTask(pipeline, enable_rtvi=False, enable_turn_tracking=False)
+        self._runner = self._shared_runner or PipelineRunner()
         self._run_task = asyncio.create_task(self._runner.run(self._task))
+
+        # Overlap TTS cold start (TLS + first synthesis) with the room join. Warmups
+        # run in the background: start() returns once joined, and a speak() that
+        # races an unfinished prefetch just synthesizes the line itself.
+        for text in self._cfg.warmup_texts:
+            task = asyncio.create_task(self._tts.prefetch(text))
+            self._prefetch_tasks.add(task)
+            task.add_done_callback(self._on_prefetch_done)
+
         await self.wait_joined()
 
         # wait up to ~2s for participant_id to become non-empty
-        for _ in range(20):
-            pid = self.participant_id()
-            if pid:
-                break
-            await asyncio.sleep(0.1)
+        if not self._pid_ready.is_set():
+            try:
+                async with asyncio.timeout(2.0):
+                    await self._pid_ready.wait()
+            except TimeoutError:
+                pass
 
-        print(f"[daily:joined] bot={self._bot_name} pid={self.participant_id()}")
+        logger.info("[daily:joined] bot={} pid={}", self._bot_name, self.participant_id())
 
 
 
 
-    async def stop(self) -> None:
-        if self._task is None:
+    async def stop_fast(self) -> None:
+        """
+        Request pipeline cancellation without waiting for the leave; stop() finishes teardown.
+        """
+        if self._task is None or self._cancel_requested:
             return
+        self._cancel_requested = True
+
+        await self._cancel_prefetches()
 
         # cancel pipeline
         await self._task.cancel()
 
+    async def stop(self) -> None:
+        if self._task is None:
+            return
+
+        await self.stop_fast()
+
         # force transport leave (so Daily room cleans up)
         leave_fn = getattr(self._transport, "leave", None)
         if callable(leave_fn):
@@ -238,78 +707,110 @@ class DailyVoiceTransport:
         self._run_task = None
         self._task = None
         self._runner = None
+        self._cancel_requested = False
 
     async def wait_joined(self, timeout_s: float = 15.0) -> None:
-        try: 
-            await asyncio.wait_for(self._joined.wait(), timeout=timeout_s)
-        except asyncio.TimeoutError as e:
+        # LEFT also ends the wait: a bot that already left will never join
+        try:
+            await self._wait_state(lambda: self._state >= _Lifecycle.JOINED, timeout_s)
+        except TimeoutError as e:
             raise TimeoutError(f"{self._bot_name} did not join within {timeout_s}s") from e
-        
+
     async def wait_left(self, timeout_s: float = 15.0) -> None:
-        await asyncio.wait_for(self._left.wait(), timeout=timeout_s)
+        await self._wait_state(lambda: self._state >= _Lifecycle.LEFT, timeout_s)
+
+    async def _wait_state(self, predicate, timeout_s: float) -> None:
+        # Already there (e.g. the orchestrator re-checking after start()):
+        # no timer, no lock, no suspension.
+        if predicate():
+            return
+        async with asyncio.timeout(timeout_s):
+            async with self._state_cv:
+                await self._state_cv.wait_for(predicate)
+
+    def _set_pid(self, pid: Any) -> None:
+        if isinstance(pid, str) and pid.strip():
+            self._pid = pid
+            self._pid_ready.set()
 
     def participant_id(self) -> Optional[str]:
+        # The local id never changes once assigned, so only resolve until the first hit
+        if self._pid:
+            return self._pid
         attr = getattr(self._transport, "participant_id", None)
         try:
             pid = attr() if callable(attr) else attr
         except Exception:
             pid = None
-        if isinstance(pid, str) and pid.strip():
-            return pid
-        return None
+        self._set_pid(pid)
+        return self._pid
     
     async def send_control(self, payload: dict[str, Any]) -> None:
-        print(f"[control:sent] bot={self._bot_name} pid={self.participant_id()} payload={payload}")
+        """
+        Broadcast a JSON-shaped control `payload` to the room.
+
+        Pass the dict itself, not pre-encoded bytes: Daily's app-message path takes
+        a JSON-serializable object and encodes it natively, off the Python side.
+        Fixed-shape messages reuse a prebuilt template (see send_turn_done).
+        """
+        logger.debug("[control:sent] bot={} pid={} payload={}", self._bot_name, self.participant_id(), payload)
 
         # If you removed RTVIProcessor (fix #1), you can send the payload raw.
         # If you ever re-enable RTVI later, wrap it with an 'id' like below:
         # payload = {"id": str(uuid4()), "label": "rtvi-ai", "type": "control", "data": payload}
 
-        send_fn = getattr(self._transport, "send_app_message", None)
-        if callable(send_fn):
-            res = send_fn(payload, "*")  # broadcast
-            if asyncio.iscoroutine(res):
-                await res
-            return
-
-        # Fallback: queue a transport message frame through the pipeline (if you want)
-        if self._task is not None:
-            frame = DailyOutputTransportMessageFrame(payload)
-            await self._task.queue_frame(frame)
+        # DailyTransport has no send_app_message of its own; app messages go out as
+        # a transport message frame, which the output processor broadcasts.
+        if self._task is None:
+            raise RuntimeError("Transport not started; call start() before send_control()")
+        await self._task.queue_frame(DailyOutputTransportMessageFrame(payload))
+
+    async def _cancel_prefetches(self) -> None:
+        """Cancel warmup prefetches that are still synthesizing."""
+        pending = set(self._prefetch_tasks)
+        for task in pending:
+            task.cancel()
+        if pending:
+            await asyncio.wait(pending)
+
+    def _on_prefetch_done(self, task: asyncio.Task) -> None:
+        self._prefetch_tasks.discard(task)
+        if task.cancelled():
             return
+        err = task.exception()
+        if err is not None:
+            logger.warning("[tts:prefetch] bot={} failed: {!r}", self._bot_name, err)
 
-
-        raise RuntimeError("No send_app_message available, and pipeline task not started")
-
+    async def send_turn_done(self, turn_id: int) -> None:
+        await self.send_control({**self._turn_done_base, "turn_id": turn_id})
 
     async def wait_for_control_from(self, expected_name: str, expected_turn_id: int, timeout_s: float = 8.0):
-        loop = asyncio.get_running_loop()
-        deadline = loop.time() + timeout_s
-
-        while True:
-            remaining = deadline - loop.time()
-            if remaining <= 0:
-                raise TimeoutError(f"Timed out waiting for turn_done from={expected_name} turn_id={expected_turn_id}")
-
-            payload, sender = await asyncio.wait_for(self._inbox.get(), timeout=remaining)
-            print(f"[control:dequeue] bot={self._bot_name} sender={sender} payload={payload}")
-
-            # payload should be the dict you sent via send_app_message
-            if not isinstance(payload, dict):
-                continue
-
-            if payload.get("type") != "turn_done":
-                continue
-
-            if payload.get("name") != expected_name:
-                continue
-
-            if payload.get("turn_id") != expected_turn_id:
-                continue
-
+        inbox = self._control_by_name.for_waiter(expected_name)
+        # payload is the dict sent via send_control; name is implied by the inbox
+        matches = _turn_done_matcher(expected_turn_id)
+
+        # It may have landed before we started waiting; other turns' entries stay queued
+        item = inbox.take_first(matches)
+        if item is not None:
+            payload, sender = item
+            logger.debug("[control:dequeue] bot={} sender={} payload={}", self._bot_name, sender, payload)
             return payload
 
-
+        # Otherwise register for it; on_app_message resolves the future directly.
+        # No await between the scan and the registration, so nothing slips past.
+        key = (expected_name, expected_turn_id)
+        fut = asyncio.get_running_loop().create_future()
+        self._pending_turns[key] = fut
+        try:
+            async with asyncio.timeout(timeout_s):
+                return await fut
+        except TimeoutError as e:
+            raise TimeoutError(
+                f"Timed out waiting for turn_done from={expected_name} turn_id={expected_turn_id}"
+            ) from e
+        finally:
+            if self._pending_turns.get(key) is fut:
+                del self._pending_turns[key]
 
     async def speak(self, text: str) -> None:
         if self._task is None:
@@ -317,10 +818,18 @@ class DailyVoiceTransport:
         try:
             await self._task.queue_frame(TTSSpeakFrame(text))
         except Exception as e:
-            print(f"[speak:error] bot={self._bot_name} err={e!r}")
+            logger.error("[speak:error] bot={} err={!r}", self._bot_name, e)
             raise
-        print(f"[speak] {self._bot_name}: {text}")
+        logger.info("[speak] {}: {}", self._bot_name, text)
 
+    async def speak_many(self, texts: list[str]) -> None:
+        """
+        Speak several consecutive lines from this bot as one utterance.
+
+        One TTSSpeakFrame (one queue hop, one TTS request) instead of one per line;
+        the cache then keys on the joined text (see join_lines).
+        """
+        await self.speak(join_lines(texts))
 
     async def wait_for_final_transcript_from(
             self,
@@ -329,21 +838,16 @@ class DailyVoiceTransport:
             contains: Optional[str] = None,
             timeout_s: float = 8.0,
     ) -> str:
-        deadline = asyncio.get_running_loop().time() + timeout_s
-        needle = (contains or "").lower().strip()
-
-        while True:
-            remaining = deadline - asyncio.get_running_loop().time()
-            if remaining <= 0:
-                raise TimeoutError(
-                    f"{self._bot_name} did not receive FINAL transcript from {expected_name} within {timeout_s}s"
-                )
-            speaker, text, is_final = await asyncio.wait_for(self._tx_inbox.get(), timeout=remaining)
-            if speaker != expected_name:
-                continue
-            if not is_final:
-                continue
+        inbox = self._tx_by_speaker.for_waiter(expected_name)
+        matches = _final_transcript_matcher(contains)
 
-            if needle and needle not in text.lower():
-                continue
-            return text
\ No newline at end of file
+        try:
+            async with asyncio.timeout(timeout_s):
+                # Sweep what's buffered in one pass; only suspend when nothing matches
+                while (item := inbox.take_first(matches)) is None:
+                    await inbox.wait_push()
+                return item[0].strip()
+        except TimeoutError as e:
+            raise TimeoutError(
+                f"{self._bot_name} did not receive FINAL transcript from {expected_name} within {timeout_s}s"
+            ) from e
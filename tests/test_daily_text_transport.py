@@ -0,0 +1,76 @@
+import asyncio
+
+from app.orchestration.daily_text_transport import DailyTextTransport, DailyTextTransportConfig
+
+
+def _transport() -> DailyTextTransport:
+    return DailyTextTransport(bot_name="Teller", cfg=DailyTextTransportConfig(room_url="https://example.daily.co/test"))
+
+
+def _text(text: str, turn_id: int) -> dict:
+    return {"type": "text", "text": text, "name": "Customer Bot", "turn_id": turn_id}
+
+
+def test_wait_for_text_from_matches_turn_id_out_of_order():
+    t = _transport()
+    # Turn 2 overtook turn 1; each waiter still gets its own turn
+    t._inbox.append((_text("second", 2), "pid-1"))
+    t._inbox.append((_text("first", 1), "pid-1"))
+
+    async def run():
+        first = await t.wait_for_text_from("Customer Bot", timeout_s=0.1, turn_id=1)
+        second = await t.wait_for_text_from("Customer Bot", timeout_s=0.1, turn_id=2)
+        return first, second
+
+    first, second = asyncio.run(run())
+    assert first["text"] == "first"
+    assert second["text"] == "second"
+    assert not t._inbox
+
+
+def test_split_text_batch_numbers_turns_from_batch_turn_id():
+    batch = {"type": "text_batch", "name": "Customer Bot", "texts": ["a", "b"], "turn_id": 5}
+
+    assert [item["turn_id"] for item in _transport()._split_text_batch(batch)] == [5, 6]
+
+
+def test_split_text_batch_expands_one_payload_per_line():
+    batch = {"type": "text_batch", "name": "Customer Bot", "texts": ["hi", "there"]}
+
+    assert _transport()._split_text_batch(batch) == [
+        {"type": "text", "text": "hi", "name": "Customer Bot"},
+        {"type": "text", "text": "there", "name": "Customer Bot"},
+    ]
+
+
+def test_split_text_batch_passes_through_single_text():
+    payload = {"type": "text", "text": "hi", "name": "Customer Bot"}
+
+    assert _transport()._split_text_batch(payload) == [payload]
+
+
+def test_split_text_batch_empty_texts():
+    assert _transport()._split_text_batch({"type": "text_batch", "name": "Customer Bot", "texts": None}) == []
+
+
+def test_app_message_consumer_survives_a_failing_handler():
+    async def run():
+        t = _transport()
+        seen: list[str] = []
+
+        async def handler(payload, sender):
+            if payload["text"] == "bad":
+                raise RuntimeError("boom")
+            seen.append(payload["text"])
+
+        t.set_app_message_handler(handler)
+        t._ensure_consumer()
+        for text in ("bad", "good"):
+            await t._transport._call_event_handler("on_app_message", _text(text, 1), "pid-1")
+        async with asyncio.timeout(1.0):
+            while not seen:
+                await asyncio.sleep(0)
+        t._consumer.cancel()
+        return seen
+
+    assert asyncio.run(run()) == ["good"]
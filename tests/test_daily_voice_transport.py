@@ -0,0 +1,280 @@
+import asyncio
+
+import pytest
+from pipecat.frames.frames import (
+    ErrorFrame,
+    FatalErrorFrame,
+    TTSAudioRawFrame,
+    TTSStartedFrame,
+    TTSStoppedFrame,
+)
+from pipecat.services.openai.tts import OpenAITTSService
+
+from app.orchestration.daily_voice_transport import (
+    _FINAL_KEYS,
+    _SPEAKER_KEYS,
+    CachedOpenAITTSService,
+    DailyVoiceTransport,
+    DailyVoiceTransportConfig,
+    _AudioRamp,
+    _first_value,
+    _Inbox,
+    _InboxMap,
+    _PinnedKey,
+    _transcript_is_final,
+    _tts_frame_kind,
+    _TTSFrameKind,
+    join_lines,
+)
+
+
+def test_pinned_key_falls_through_null_field():
+    probe = _PinnedKey(_SPEAKER_KEYS)
+    msg = {"participantName": None, "participantId": "abc"}
+
+    assert probe.get(msg, "unknown") == "abc"
+    assert probe.get(msg, "unknown") == _first_value(msg, _SPEAKER_KEYS, "unknown")
+
+
+def test_pinned_key_repins_only_on_truthy_hit():
+    probe = _PinnedKey(_SPEAKER_KEYS)
+    assert probe.get({"participantId": "abc"}) == "abc"
+
+    # Pinned key present but empty: sweep again instead of returning the default
+    assert probe.get({"participantId": "", "user_name": "Customer Bot"}) == "Customer Bot"
+    # Nothing truthy anywhere: default, and the last truthy pin is kept
+    assert probe.get({"participantId": None}, "unknown") == "unknown"
+    assert probe.get({"user_name": "Teller"}) == "Teller"
+
+
+def test_transcript_is_final_reads_raw_response():
+    top_level = _PinnedKey(_FINAL_KEYS).get
+
+    # pipecat's DailyTransport shape: is_final only under rawResponse
+    assert _transcript_is_final({"text": "hi", "rawResponse": {"is_final": True}}, top_level)
+    assert not _transcript_is_final({"text": "hi", "rawResponse": {"is_final": False}}, top_level)
+    # rawResponse wins over a stray top-level key
+    assert not _transcript_is_final({"rawResponse": {"is_final": False}, "is_final": True}, top_level)
+    # other shapes fall back to the top-level keys
+    assert _transcript_is_final({"text": "hi", "final": True}, top_level)
+    assert not _transcript_is_final({"text": "hi"}, top_level)
+
+
+def test_tts_frame_kind_classifies_subclasses_like_their_base():
+    assert _tts_frame_kind(TTSAudioRawFrame) is _TTSFrameKind.AUDIO
+    assert _tts_frame_kind(ErrorFrame) is _TTSFrameKind.ERROR
+    assert issubclass(FatalErrorFrame, ErrorFrame)
+    assert _tts_frame_kind(FatalErrorFrame) is _TTSFrameKind.ERROR
+    assert _tts_frame_kind(TTSStartedFrame) is _TTSFrameKind.OTHER
+
+
+def _transport() -> DailyVoiceTransport:
+    cfg = DailyVoiceTransportConfig(room_url="https://example.daily.co/test", openai_api_key="sk-test")
+    return DailyVoiceTransport(bot_name="Teller", cfg=cfg)
+
+
+def test_transcription_handler_queues_finals_and_drops_partials():
+    async def run():
+        t = _transport()
+        for is_final, text in ((False, "hel"), (True, "hello")):
+            msg = {"participantId": "pid-1", "text": text, "rawResponse": {"is_final": is_final}}
+            # Same entry point pipecat's DailyTransport uses: handlers get (transport, message)
+            await t._transport._call_event_handler("on_transcription_message", msg)
+        await asyncio.sleep(0)
+        inbox = t._tx_by_speaker.for_waiter("pid-1")
+        assert inbox.take_first(lambda item: True) == ("hello", "hello", True)
+        assert inbox.take_first(lambda item: True) is None
+
+    asyncio.run(run())
+
+
+def test_inbox_map_caps_names_added_by_events():
+    inboxes = _InboxMap(maxlen=4, max_names=2)
+
+    first = inboxes.for_event("a")
+    assert first is not None
+    assert inboxes.for_event("a") is first
+    assert inboxes.for_event("b") is not None
+    # Map is full: a new name from an event gets nothing...
+    assert inboxes.for_event("c") is None
+    # ...but a waiter always gets its inbox, and events for it are then accepted
+    waiter = inboxes.for_waiter("c")
+    assert inboxes.for_event("c") is waiter
+
+
+def test_transcription_from_unknown_speaker_past_cap_is_dropped():
+    async def run():
+        cfg = DailyVoiceTransportConfig(
+            room_url="https://example.daily.co/test", openai_api_key="sk-test", max_inbox_names=1
+        )
+        t = DailyVoiceTransport(bot_name="Teller", cfg=cfg)
+        for speaker in ("pid-1", "pid-2"):
+            msg = {"participantId": speaker, "text": "hi", "rawResponse": {"is_final": True}}
+            await t._transport._call_event_handler("on_transcription_message", msg)
+        await asyncio.sleep(0)
+        assert t._inbox_drops == 1
+        assert t._tx_by_speaker.for_event("pid-2") is None
+
+    asyncio.run(run())
+
+
+def test_join_lines_ends_each_line_with_punctuation():
+    assert join_lines(["Hi there", "How can I help?", ' She said "yes." ', ""]) == (
+        'Hi there. How can I help? She said "yes."'
+    )
+
+
+def test_join_lines_leaves_a_single_line_untouched():
+    assert join_lines(["no period "]) == "no period "
+
+
+def test_tts_cache_misses_when_the_output_rate_changes(monkeypatch):
+    calls: list[int] = []
+
+    async def fake_run_tts(self, text, context_id):
+        calls.append(self.sample_rate)
+        yield TTSStartedFrame(context_id=context_id)
+        yield TTSAudioRawFrame(bytes(960), self.sample_rate, 1, context_id=context_id)
+        yield TTSStoppedFrame(context_id=context_id)
+
+    monkeypatch.setattr(OpenAITTSService, "run_tts", fake_run_tts)
+
+    async def speak(svc, text):
+        return [f async for f in svc.run_tts(text, "ctx") if isinstance(f, TTSAudioRawFrame)]
+
+    async def run():
+        svc = CachedOpenAITTSService(api_key="sk-test", cache_size=8)
+        await svc.prefetch("hi")  # before StartFrame: OpenAI's native rate
+        assert calls == [24000]
+
+        svc._sample_rate = 16000  # what StartFrame sets from audio_out_sample_rate
+        frames = await speak(svc, "hi")
+        assert calls == [24000, 16000]
+        assert {f.sample_rate for f in frames} == {16000}
+
+        svc._sample_rate = 24000
+        frames = await speak(svc, "hi")
+        assert calls == [24000, 16000]  # replayed the prefetched entry
+        assert {f.sample_rate for f in frames} == {24000}
+
+    asyncio.run(run())
+
+
+def test_audio_ramp_doubles_up_to_max_chunk():
+    ramp = _AudioRamp(sample_rate=1000, num_channels=1)  # 2 bytes per ms
+    audio = bytes(range(256)) * 8  # 2048 bytes = 1024 ms
+
+    chunks = ramp.feed(audio)
+
+    assert [len(c) // 2 for c in chunks] == [20, 40, 80, 160, 200, 200, 200]
+    tail = ramp.flush()
+    assert [len(c) // 2 for c in tail] == [114, 10]
+    assert b"".join(chunks + tail) == audio
+    assert ramp.flush() == []
+
+
+def test_audio_ramp_buffers_partial_chunks():
+    ramp = _AudioRamp(sample_rate=1000, num_channels=1)
+
+    assert ramp.feed(bytes(30)) == []
+    assert [len(c) for c in ramp.feed(bytes(10))] == [40]
+    # Shorter than the tail: flushed as a single chunk
+    assert ramp.feed(bytes(8)) == []
+    assert [len(c) for c in ramp.flush()] == [8]
+
+
+def test_inbox_evicts_oldest_when_full():
+    inbox = _Inbox(maxlen=2)
+
+    assert not inbox.push(1)
+    assert not inbox.push(2)
+    assert inbox.push(3)
+    assert inbox.take_first(lambda n: n == 1) is None
+    assert inbox.take_first(lambda n: True) == 2
+    assert inbox.take_first(lambda n: True) == 3
+
+
+def test_offer_counts_ring_evictions():
+    t = _transport()
+    inbox = _Inbox(maxlen=1)
+
+    t._offer(inbox, "a")
+    t._offer(inbox, "b")
+
+    assert t._inbox_drops == 1
+    assert inbox.take_first(lambda item: True) == "b"
+
+
+def test_inbox_take_first_leaves_other_entries():
+    inbox = _Inbox(maxlen=4)
+    for n in (1, 2, 3):
+        inbox.push(n)
+
+    assert inbox.take_first(lambda n: n % 2 == 0) == 2
+    assert inbox.take_first(lambda n: n == 2) is None
+    assert inbox.take_first(lambda n: True) == 1
+    assert inbox.take_first(lambda n: True) == 3
+
+
+def test_inbox_wait_push_wakes_on_next_push():
+    async def run():
+        inbox = _Inbox(maxlen=4)
+        inbox.push("stale")
+        # An entry already queued doesn't count; only a push after the wait starts
+        waiter = asyncio.create_task(inbox.wait_push())
+        await asyncio.sleep(0)
+        assert not waiter.done()
+
+        inbox.push("fresh")
+        async with asyncio.timeout(1.0):
+            await waiter
+
+    asyncio.run(run())
+
+
+def test_pending_turn_resolved_by_delivery():
+    async def run():
+        t = _transport()
+        waiter = asyncio.create_task(t.wait_for_control_from("Customer Bot", 3, timeout_s=1.0))
+        await asyncio.sleep(0)
+        assert ("Customer Bot", 3) in t._pending_turns
+
+        msg = {"type": "turn_done", "name": "Customer Bot", "turn_id": 3}
+        t._deliver_control("Customer Bot", msg, "pid-1")
+
+        assert await waiter is msg
+        assert t._pending_turns == {}
+        # Handed straight to the waiter, not queued
+        assert t._control_by_name.for_waiter("Customer Bot").take_first(lambda item: True) is None
+
+    asyncio.run(run())
+
+
+def test_pending_turn_cleaned_up_on_timeout():
+    async def run():
+        t = _transport()
+        with pytest.raises(TimeoutError):
+            await t.wait_for_control_from("Customer Bot", 3, timeout_s=0.01)
+        assert t._pending_turns == {}
+
+        # A late turn_done lands in the inbox for the next waiter
+        msg = {"type": "turn_done", "name": "Customer Bot", "turn_id": 3}
+        t._deliver_control("Customer Bot", msg, "pid-1")
+        assert await t.wait_for_control_from("Customer Bot", 3, timeout_s=0.01) is msg
+
+    asyncio.run(run())
+
+
+def test_early_turn_done_dequeued_without_registering():
+    async def run():
+        t = _transport()
+        other = {"type": "turn_done", "name": "Customer Bot", "turn_id": 4}
+        mine = {"type": "turn_done", "name": "Customer Bot", "turn_id": 3}
+        t._deliver_control("Customer Bot", other, "pid-1")
+        t._deliver_control("Customer Bot", mine, "pid-1")
+
+        assert await t.wait_for_control_from("Customer Bot", 3, timeout_s=0.01) is mine
+        assert t._pending_turns == {}
+        assert t._control_by_name.for_waiter("Customer Bot").take_first(lambda item: True) == (other, "pid-1")
+
+    asyncio.run(run())
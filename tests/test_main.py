@@ -0,0 +1,97 @@
+import asyncio
+
+import pytest
+
+from app import main
+
+
+class _FakeTransport:
+    """Stands in for a Daily transport; _build is patched to hand it back as-is."""
+
+    def __init__(self, barrier: asyncio.Barrier | None = None, start_exc: BaseException | None = None):
+        self.calls: list[str] = []
+        self._barrier = barrier
+        self._start_exc = start_exc
+
+    async def start(self) -> None:
+        self.calls.append("start")
+        if self._barrier is not None:
+            await self._barrier.wait()
+        if self._start_exc is not None:
+            raise self._start_exc
+
+    async def stop_fast(self) -> None:
+        self.calls.append("stop_fast")
+
+    async def stop(self) -> None:
+        self.calls.append("stop")
+
+
+@pytest.fixture
+def fake_build(monkeypatch):
+    monkeypatch.setattr(main, "_build", lambda bot_name, cfg, runner: cfg)
+
+
+def test_start_pair_joins_both_bots_concurrently(fake_build):
+    async def run():
+        # Each start waits for the other one; a serial start would never get past the barrier
+        barrier = asyncio.Barrier(2)
+        teller, customer = _FakeTransport(barrier), _FakeTransport(barrier)
+        async with asyncio.timeout(1.0):
+            return teller, customer, await main._start_pair(teller, customer, runner=None)
+
+    teller, customer, pair = asyncio.run(run())
+    assert pair == (teller, customer)
+    assert teller.calls == customer.calls == ["start"]
+
+
+def test_group_steps_collapses_consecutive_speakers():
+    steps = [
+        main.Step("customer", "a"),
+        main.Step("customer", "b"),
+        main.Step("teller", "c"),
+        main.Step("customer", "d"),
+    ]
+
+    assert main._group_steps(steps) == [
+        ("customer", ["a", "b"]),
+        ("teller", ["c"]),
+        ("customer", ["d"]),
+    ]
+
+
+def test_group_steps_empty():
+    assert main._group_steps([]) == []
+
+
+def test_start_pair_shuts_both_down_when_one_join_fails(fake_build):
+    teller = _FakeTransport()
+    customer = _FakeTransport(start_exc=TimeoutError("Customer Bot did not join"))
+
+    # Bare TimeoutError, not an ExceptionGroup
+    with pytest.raises(TimeoutError, match="did not join"):
+        asyncio.run(main._start_pair(teller, customer, runner=None))
+
+    assert teller.calls == customer.calls == ["start", "stop_fast", "stop"]
+
+
+def test_shutdown_logs_and_continues_past_a_failing_transport():
+    class _Broken(_FakeTransport):
+        async def stop_fast(self) -> None:
+            raise RuntimeError("boom")
+
+    broken, healthy = _Broken(), _FakeTransport()
+    asyncio.run(main._shutdown(broken, healthy))
+
+    assert broken.calls == ["stop"]
+    assert healthy.calls == ["stop_fast", "stop"]
+
+
+def test_log_level_normalizes_known_levels():
+    assert main._log_level(" debug ") == "DEBUG"
+    assert main._log_level(None) == "INFO"
+    assert main._log_level("") == "INFO"
+
+
+def test_log_level_rejects_unknown_level():
+    assert main._log_level("chatty") is None